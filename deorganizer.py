@@ -1,9 +1,20 @@
 import os
+import sys
+import errno
+import ctypes
 import shutil
 import argparse
 from pathlib import Path
+from typing import List
 import logging
+from collections import Counter
+import threading
 from tqdm import tqdm
+import concurrent.futures
+
+# Moving files is IO-bound, so the pool is sized for the storage rather
+# than the CPU count (the ThreadPoolExecutor default)
+DEFAULT_IO_THREADS = 16
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure logging based on verbosity level."""
@@ -14,31 +25,169 @@ def setup_logging(verbose: bool = False) -> None:
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
-def get_unique_filename(destination_path: str) -> str:
+class DirNameCache:
     """
-    Generate a unique filename if a duplicate exists.
+    In-memory view of the names in a directory, used to hand out unique
+    file names without probing the file system for every candidate.
     
-    Args:
-        destination_path: The target file path
+    Names are compared case-folded so two files that differ only by case
+    can't overwrite each other on case-insensitive file systems.
+    """
+    
+    def __init__(self, directory: str, names: List[str] = None):
+        self.directory = directory
+        if names is None:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                # Directory doesn't exist yet (e.g. during a dry run)
+                names = []
+        self.names = {name.casefold() for name in names}
+        self.counters = Counter()
+        self.lock = threading.Lock()
+    
+    def reserve(self, filename: str) -> str:
+        """
+        Claim a unique name for a file in this directory.
         
-    Returns:
-        A unique file path that doesn't exist yet
+        Args:
+            filename: The desired file name
+            
+        Returns:
+            The full path of a name that no other file holds or has reserved
+        """
+        with self.lock:
+            if filename.casefold() not in self.names:
+                self.names.add(filename.casefold())
+                return os.path.join(self.directory, filename)
+            
+            name, extension = os.path.splitext(filename)
+            counter_key = (name.casefold(), extension.casefold())
+            while True:
+                # Names are never released, so numbering can resume where
+                # the last duplicate of this name left off
+                self.counters[counter_key] += 1
+                new_filename = f"{name} ({self.counters[counter_key]}){extension}"
+                if new_filename.casefold() not in self.names:
+                    self.names.add(new_filename.casefold())
+                    return os.path.join(self.directory, new_filename)
+
+# renameat2() flags and the "relative to the working directory" descriptor
+AT_FDCWD = -100
+RENAME_NOREPLACE = 1
+
+def load_renameat2():
+    """Look up the C library's renameat2, or return None where it isn't available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return None
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2
+
+renameat2 = load_renameat2()
+
+def rename_noreplace(source_path: str, dest_path: str) -> None:
     """
-    if not os.path.exists(destination_path):
-        return destination_path
+    Rename a file without ever replacing an existing destination.
+    
+    On Linux this is a single renameat2(RENAME_NOREPLACE) call, which
+    checks for the destination and renames atomically. On Windows
+    os.rename already refuses to replace files. Elsewhere, or on file
+    systems that don't support the flag, the destination is checked first.
+    
+    Args:
+        source_path: The file to rename
+        dest_path: The target file path
         
-    directory, filename = os.path.split(destination_path)
-    name, extension = os.path.splitext(filename)
+    Raises:
+        FileExistsError: If dest_path already exists
+    """
+    if renameat2 is not None:
+        if renameat2(AT_FDCWD, os.fsencode(source_path), AT_FDCWD, os.fsencode(dest_path), RENAME_NOREPLACE) == 0:
+            return
+        err = ctypes.get_errno()
+        # EINVAL/ENOSYS mean the flag or call isn't supported here
+        if err not in (errno.EINVAL, errno.ENOSYS):
+            raise OSError(err, os.strerror(err), source_path, None, dest_path)
+    
+    if os.name != "nt" and os.path.lexists(dest_path):
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dest_path)
+    os.rename(source_path, dest_path)
+
+def move_file(source_path: str, dest_path: str, name_cache: DirNameCache) -> str:
+    """
+    Move a file, trying a plain rename first.
     
-    counter = 1
+    A rename is a single syscall when both paths are on the same file
+    system, which is the usual case when flattening. shutil.move is only
+    used as a fallback when the rename fails with EXDEV. If something else
+    created dest_path after the directory was listed, the next free name
+    is taken from name_cache instead of overwriting it.
+    
+    Args:
+        source_path: The file to move
+        dest_path: The target file path
+        name_cache: Cache of names in the destination directory
+        
+    Returns:
+        The path the file was moved to
+    """
     while True:
-        new_filename = f"{name} ({counter}){extension}"
-        new_path = os.path.join(directory, new_filename)
-        if not os.path.exists(new_path):
-            return new_path
-        counter += 1
+        try:
+            rename_noreplace(source_path, dest_path)
+            return dest_path
+        except FileExistsError:
+            dest_path = name_cache.reserve(os.path.basename(source_path))
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            shutil.move(source_path, dest_path)
+            return dest_path
+
+def scan_tree(directory_path: str):
+    """
+    Walk a directory tree with os.scandir in a single pass.
+    
+    Files are yielded as ('f', entry) before the contents of their
+    subdirectories, and each subdirectory is yielded as ('d', entry) after
+    its own contents (post-order), so directories can be removed in the
+    order they are produced. Like os.walk, symlinked directories are not
+    followed.
+    
+    Args:
+        directory_path: Path to the directory to walk
+    """
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if not is_dir:
+                    files.append(entry)
+                elif not entry.is_symlink():
+                    subdirs.append(entry)
+    except OSError as e:
+        logging.error(f"Failed to scan directory {directory_path}: {str(e)}")
+        return
+    
+    for entry in files:
+        yield 'f', entry
+    
+    for entry in subdirs:
+        yield from scan_tree(entry.path)
+        yield 'd', entry
 
-def flatten_directory(directory_path: str, dry_run: bool = False, verbose: bool = False) -> None:
+def flatten_directory(directory_path: str, dry_run: bool = False, verbose: bool = False,
+                      threads: int = DEFAULT_IO_THREADS) -> None:
     """
     Moves all files from subdirectories to the main directory.
     
@@ -46,35 +195,44 @@ def flatten_directory(directory_path: str, dry_run: bool = False, verbose: bool
         directory_path: Path to the directory to flatten
         dry_run: If True, only show what would be done without making changes
         verbose: Whether to print detailed logging information
+        threads: Number of worker threads used to move files
     """
     setup_logging(verbose)
     
     # Convert to absolute path
     directory_path = os.path.abspath(directory_path)
     
-    if not os.path.exists(directory_path):
+    # Find all files in subdirectories, remembering the subdirectories
+    # themselves (deepest first) for the cleanup pass
+    total_files = 0
+    files_to_move = []
+    subdirectories = []
+    
+    # A missing path or a file is reported by scandir itself, which saves
+    # the separate exists/isdir stat calls
+    try:
+        with os.scandir(directory_path) as entries:
+            top_level_dirs = [entry for entry in entries
+                              if entry.is_dir() and not entry.is_symlink()]
+    except FileNotFoundError:
         logging.error(f"Error: Directory '{directory_path}' does not exist!")
         return
-    
-    if not os.path.isdir(directory_path):
+    except NotADirectoryError:
         logging.error(f"Error: '{directory_path}' is not a directory!")
         return
     
-    # Find all files in subdirectories
-    total_files = 0
-    files_to_move = []
-    
     logging.info(f"Scanning directory: {directory_path}")
-    for root, dirs, files in os.walk(directory_path):
-        # Skip the main directory itself
-        if root == directory_path:
-            continue
-        
-        for filename in files:
-            source_path = os.path.join(root, filename)
-            dest_path = os.path.join(directory_path, filename)
-            files_to_move.append((source_path, dest_path))
+    
+    for top_level_dir in top_level_dirs:
+        for kind, entry in scan_tree(top_level_dir.path):
+            if kind == 'd':
+                subdirectories.append(entry.path)
+                continue
+            
+            dest_path = os.path.join(directory_path, entry.name)
+            files_to_move.append((entry.path, dest_path))
             total_files += 1
+        subdirectories.append(top_level_dir.path)
     
     if total_files == 0:
         print("No files found in subdirectories. Nothing to do.")
@@ -98,18 +256,27 @@ def flatten_directory(directory_path: str, dry_run: bool = False, verbose: bool
     skipped_files = 0
     failed_files = 0
     
-    with tqdm(total=total_files, disable=not verbose) as pbar:
-        for source_path, dest_path in files_to_move:
+    # Resolve every destination up front so the worker threads never race
+    # for the same name
+    name_cache = DirNameCache(directory_path)
+    planned_moves = []
+    for source_path, dest_path in files_to_move:
+        unique_dest_path = name_cache.reserve(os.path.basename(dest_path))
+        if verbose and unique_dest_path != dest_path:
+            logging.info(f"Duplicate detected, renaming: {dest_path} -> {unique_dest_path}")
+        planned_moves.append((source_path, unique_dest_path))
+    
+    # Moves are IO-bound, so overlap them on a thread pool
+    with tqdm(total=total_files, disable=not verbose) as pbar, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=threads,
+                                                  thread_name_prefix="flatten") as executor:
+        futures = {executor.submit(move_file, source_path, dest_path, name_cache): source_path
+                   for source_path, dest_path in planned_moves}
+        
+        for future in concurrent.futures.as_completed(futures):
+            source_path = futures[future]
             try:
-                # Handle duplicates by creating a unique filename
-                if os.path.exists(dest_path):
-                    unique_dest_path = get_unique_filename(dest_path)
-                    if verbose:
-                        logging.info(f"Duplicate detected, renaming: {dest_path} -> {unique_dest_path}")
-                    dest_path = unique_dest_path
-                
-                # Move the file
-                shutil.move(source_path, dest_path)
+                dest_path = future.result()
                 moved_files += 1
                 
                 if verbose:
@@ -127,19 +294,18 @@ def flatten_directory(directory_path: str, dry_run: bool = False, verbose: bool
     print("\nRemoving empty directories...")
     dirs_removed = 0
     
-    for root, dirs, files in os.walk(directory_path, topdown=False):
-        if root == directory_path:
-            continue
-        
+    # Subdirectories are listed deepest first, so a single rmdir attempt per
+    # directory is enough: rmdir itself refuses to remove one that still
+    # holds files (e.g. after a failed move)
+    for subdirectory in subdirectories:
         try:
-            # Check if directory is empty
-            if not os.listdir(root):
-                os.rmdir(root)
-                rel_path = os.path.relpath(root, start=directory_path)
-                logging.info(f"Removed empty directory: {rel_path}")
-                dirs_removed += 1
+            os.rmdir(subdirectory)
+            rel_path = os.path.relpath(subdirectory, start=directory_path)
+            logging.info(f"Removed empty directory: {rel_path}")
+            dirs_removed += 1
         except OSError as e:
-            logging.error(f"Failed to remove directory {root}: {str(e)}")
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                logging.error(f"Failed to remove directory {subdirectory}: {str(e)}")
     
     # Summary
     print("\n✅ Flattening complete!")
@@ -154,6 +320,9 @@ if __name__ == "__main__":
     parser.add_argument("directory", help="Directory path to flatten")
     parser.add_argument("--dry-run", "-d", action="store_true", help="Show what would be done without making changes")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose output")
+    parser.add_argument("--threads", "-t", type=int, default=DEFAULT_IO_THREADS,
+                        help=f"Number of worker threads used to move files (default {DEFAULT_IO_THREADS}; "
+                             "raise it for network drives)")
     
     args = parser.parse_args()
     
@@ -161,7 +330,8 @@ if __name__ == "__main__":
         flatten_directory(
             args.directory,
             dry_run=args.dry_run,
-            verbose=args.verbose
+            verbose=args.verbose,
+            threads=args.threads
         )
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
@@ -2,18 +2,97 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import threading
+import queue
 import io
 import sys
 from contextlib import redirect_stdout
 import shutil
 import argparse
-from collections import defaultdict
+from collections import defaultdict, Counter
+from itertools import chain
+from operator import itemgetter
 import re
+import hashlib
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
 from typing import Set, List, Dict, Tuple
 import logging
+import time
 from tqdm import tqdm
 import concurrent.futures
 import difflib
+from deorganizer import DEFAULT_IO_THREADS, DirNameCache, move_file
+
+# rapidfuzz (with numpy) is optional: when installed, filename similarity
+# is scored by its multithreaded C++ implementation instead of difflib
+try:
+    import numpy as np
+    from rapidfuzz import process
+    from rapidfuzz.distance import Indel
+except ImportError:
+    process = Indel = None
+
+# python-Levenshtein is a lighter optional alternative: its C ratio()
+# replaces difflib in the pairwise comparison loop
+try:
+    import Levenshtein
+except ImportError:
+    Levenshtein = None
+
+# datasketch is optional: on very large folders it narrows the similarity
+# search down to likely matches with MinHash LSH
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:
+    MinHash = MinHashLSH = None
+
+# pyahocorasick is optional: when installed, files are matched against all
+# common patterns in a single scan of each name
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Upper bound on the number of scores held in memory at once when
+# comparing filenames with rapidfuzz (8 bytes each)
+SCORE_BLOCK_CELLS = 2_000_000
+
+# Number of names above which similar names are found with MinHash LSH
+# rather than by comparing every pair. LSH may miss a few weak matches, so
+# it is only worth it where the exact comparison gets too slow.
+LSH_MIN_FILES = 50_000
+
+# Character shingle length and number of permutations for the MinHashes
+SHINGLE_SIZE = 2
+MINHASH_PERMUTATIONS = 64
+
+# Regexes used on every filename, compiled once at import
+NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9\s]')
+BASE_NAME_STRIP_RE = re.compile(r'[\d_\-\s()\[\]@#$%^&*!~+=|{}:;\'"<>?/,]+')
+GROUP_NAME_STRIP_RE = re.compile(r'[\d_\-\s()]+')
+PHRASE_RE = re.compile(r'\b(\w+\s+\w+(?:\s+\w+){0,3})\b')
+
+# bytes.translate table for ASCII names: every character BASE_NAME_STRIP_RE
+# strips becomes a space and the rest are lowercased, in a single C pass
+BASE_NAME_STRIP_TABLE = bytes(
+    ord(' ') if BASE_NAME_STRIP_RE.fullmatch(chr(code)) else ord(chr(code).lower())
+    for code in range(128)
+) + bytes(range(128, 256))
+
+# str.translate table mapping the ASCII characters GROUP_NAME_STRIP_RE
+# strips to spaces (whitespace is left to str.split)
+GROUP_NAME_STRIP_TABLE = str.maketrans({char: ' ' for char in '0123456789_-()'})
+
+# Bytes hashed to tell apart same-sized files before reading them in full
+DUPLICATE_PREFIX_SIZE = 4096
+
+# How often (in milliseconds) the GUI moves queued output into the text area
+OUTPUT_POLL_MS = 50
+
+# Minimum time (in seconds) between progress reports while moving files
+PROGRESS_INTERVAL = 0.1
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure logging based on verbosity level."""
@@ -24,6 +103,7 @@ def setup_logging(verbose: bool = False) -> None:
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
+@lru_cache(maxsize=4096)
 def sanitize_folder_name(folder_name: str) -> str:
     """
     Sanitize folder names by removing invalid characters.
@@ -34,38 +114,300 @@ def sanitize_folder_name(folder_name: str) -> str:
     Returns:
         A sanitized folder name safe for file systems
     """
-    sanitized = re.sub(r'[^a-zA-Z0-9\s]', " ", folder_name)
-    # Replace multiple spaces with a single space
-    sanitized = re.sub(r"\s+", " ", sanitized)
-    # Remove leading/trailing spaces
-    sanitized = sanitized.strip()
-    # Capitalize each word for readability
+    sanitized = NON_ALNUM_RE.sub(" ", folder_name)
+    # Capitalize each word for readability. split() also collapses runs of
+    # whitespace and drops leading/trailing spaces.
     sanitized = ' '.join(word.capitalize() for word in sanitized.split())
     
     if not sanitized or len(sanitized) > 255:
-        return "Group_" + str(hash(folder_name) % 10000)
+        # Stable across runs (unlike hash()), so a dry run and the real run
+        # pick the same name
+        return "Group_" + hashlib.blake2b(folder_name.encode('utf-8', 'surrogatepass'), digest_size=3).hexdigest()
     return sanitized
 
 def get_file_base_name(filename: str) -> str:
     """Extract base name without extension and normalize for comparison."""
-    base_name = os.path.splitext(filename)[0]
+    return normalize_stem(os.path.splitext(filename)[0])
+
+@lru_cache(maxsize=4096)
+def normalize_stem(base_name: str) -> str:
+    """Normalize a file name without its extension for comparison."""
+    if base_name.isascii():
+        # Same result as the regex below: map the stripped characters to
+        # spaces, then collapse the runs and trim in one split/join
+        return ' '.join(base_name.encode('ascii').translate(BASE_NAME_STRIP_TABLE).decode('ascii').split())
+    
     # Remove digits and special chars for better matching
-    normalized = re.sub(r'[\d_\-\s()\[\]@#$%^&*!~+=|{}:;\'"<>?/,]+', ' ', base_name.lower()).strip()
+    normalized = BASE_NAME_STRIP_RE.sub(' ', base_name.lower()).strip()
     return normalized
 
-def find_similar_files(file_names: List[str], similarity_threshold: float = 0.7) -> Dict[str, List[str]]:
+def lengths_can_match(len1: int, len2: int, similarity_threshold: float) -> bool:
+    """Check whether two base names are close enough in length to be compared."""
+    # Skip comparison if base names are too different in length
+    if abs(len1 - len2) > min(len1, len2):
+        return False
+    
+    # The ratio can never exceed 2 * min(len1, len2) / (len1 + len2), so
+    # skip pairs whose lengths alone rule out a match
+    return 2 * min(len1, len2) >= similarity_threshold * (len1 + len2)
+
+class LengthIndex:
+    """
+    Base name positions sorted by length, so the names whose length is
+    close enough to be compared can be found with a binary search instead
+    of checking every name.
+    """
+    
+    def __init__(self, lengths: List[int], similarity_threshold: float):
+        self.lengths = lengths
+        self.order = sorted(range(len(lengths)), key=lengths.__getitem__)
+        self.sorted_lengths = [lengths[i] for i in self.order]
+        self.similarity_threshold = similarity_threshold
+    
+    def candidates_after(self, i: int):
+        """
+        Find the later names that lengths_can_match may accept for name i.
+        
+        Args:
+            i: Position of the name to match
+            
+        Returns:
+            Positions greater than i, in ascending order
+        """
+        length = self.lengths[i]
+        # Bounds implied by lengths_can_match, widened slightly so float
+        # rounding can never drop a name it would accept
+        low = length / 2
+        high = length * 2
+        if self.similarity_threshold > 0:
+            low = max(low, length * self.similarity_threshold / (2 - self.similarity_threshold))
+            high = min(high, length * (2 - self.similarity_threshold) / self.similarity_threshold)
+        
+        start = bisect_left(self.sorted_lengths, low - 1e-9)
+        stop = bisect_right(self.sorted_lengths, high + 1e-9)
+        
+        # When most names fall inside the window, sorting it costs more
+        # than simply scanning everything after i
+        if 2 * (stop - start) > len(self.order):
+            return range(i + 1, len(self.order))
+        return sorted(j for j in self.order[start:stop] if j > i)
+
+def match_similar_difflib(bases: List[str], similarity_threshold: float) -> List[List[int]]:
+    """
+    Greedily group similar base names using difflib.
+    
+    Each name, in order, collects every later unassigned name whose
+    SequenceMatcher ratio reaches the threshold.
+    
+    Args:
+        bases: Normalized base names to compare
+        similarity_threshold: Threshold for considering names similar (0.0-1.0)
+        
+    Returns:
+        Groups of two or more indices into bases, each in ascending order
+    """
+    # Reuse a single matcher instead of building one per pair. The outer
+    # name stays the first sequence: ratio() is not symmetric, so swapping
+    # the arguments would change which files get grouped.
+    matcher = difflib.SequenceMatcher(None)
+    lengths = [len(base) for base in bases]
+    length_index = LengthIndex(lengths, similarity_threshold)
+    assigned = bytearray(len(bases))
+    groups = []
+    
+    for i, base1 in enumerate(bases):
+        # Skip if this name is already in a group
+        if assigned[i]:
+            continue
+        
+        current_group = [i]
+        len1 = lengths[i]
+        matcher.set_seq1(base1)
+        
+        for j in length_index.candidates_after(i):
+            if assigned[j] or not lengths_can_match(len1, lengths[j], similarity_threshold):
+                continue
+            
+            matcher.set_seq2(bases[j])
+            # quick_ratio() is a cheap upper bound on ratio(), so most
+            # pairs are rejected before the full matching runs
+            if (matcher.quick_ratio() >= similarity_threshold
+                    and matcher.ratio() >= similarity_threshold):
+                current_group.append(j)
+                assigned[j] = 1
+        
+        if len(current_group) > 1:
+            assigned[i] = 1
+            groups.append(current_group)
+    
+    return groups
+
+def match_similar_levenshtein(bases: List[str], similarity_threshold: float) -> List[List[int]]:
+    """
+    Greedily group similar base names using python-Levenshtein.
+    
+    Same grouping as match_similar_difflib, scored with Levenshtein.ratio,
+    which is computed in C.
+    
+    Args:
+        bases: Normalized base names to compare
+        similarity_threshold: Threshold for considering names similar (0.0-1.0)
+        
+    Returns:
+        Groups of two or more indices into bases, each in ascending order
+    """
+    ratio = Levenshtein.ratio
+    lengths = [len(base) for base in bases]
+    length_index = LengthIndex(lengths, similarity_threshold)
+    assigned = bytearray(len(bases))
+    groups = []
+    
+    for i, base1 in enumerate(bases):
+        if assigned[i]:
+            continue
+        
+        current_group = [i]
+        len1 = lengths[i]
+        
+        for j in length_index.candidates_after(i):
+            if (not assigned[j]
+                    and lengths_can_match(len1, lengths[j], similarity_threshold)
+                    and ratio(base1, bases[j]) >= similarity_threshold):
+                current_group.append(j)
+                assigned[j] = 1
+        
+        if len(current_group) > 1:
+            assigned[i] = 1
+            groups.append(current_group)
+    
+    return groups
+
+def match_similar_rapidfuzz(bases: List[str], similarity_threshold: float) -> List[List[int]]:
+    """
+    Greedily group similar base names using rapidfuzz.
+    
+    Same grouping as match_similar_difflib, scored with the normalized
+    Indel similarity. Rows of the score matrix are computed in blocks with
+    process.cdist, which runs on all cores, so only the matches themselves
+    are handled in Python.
+    
+    Args:
+        bases: Normalized base names to compare
+        similarity_threshold: Threshold for considering names similar (0.0-1.0)
+        
+    Returns:
+        Groups of two or more indices into bases, each in ascending order
+    """
+    lengths = [len(base) for base in bases]
+    assigned = bytearray(len(bases))
+    groups = []
+    block_size = max(1, SCORE_BLOCK_CELLS // max(len(bases), 1))
+    
+    for start in range(0, len(bases), block_size):
+        stop = min(start + block_size, len(bases))
+        # Only later names are ever compared, so columns start at the block.
+        # No score_cutoff: rapidfuzz drops scores equal to a float cutoff,
+        # while a score exactly at the threshold counts as a match here.
+        scores = process.cdist(
+            bases[start:stop],
+            bases[start:],
+            scorer=Indel.normalized_similarity,
+            dtype=np.float64,
+            workers=-1
+        )
+        
+        for i in range(start, stop):
+            if assigned[i]:
+                continue
+            
+            current_group = [i]
+            row = scores[i - start, i - start + 1:]
+            for j in (np.flatnonzero(row >= similarity_threshold) + i + 1).tolist():
+                if not assigned[j] and lengths_can_match(lengths[i], lengths[j], similarity_threshold):
+                    current_group.append(j)
+                    assigned[j] = 1
+            
+            if len(current_group) > 1:
+                assigned[i] = 1
+                groups.append(current_group)
+    
+    return groups
+
+def match_similar_lsh(bases: List[str], similarity_threshold: float) -> List[List[int]]:
+    """
+    Greedily group similar base names, comparing only likely matches.
+    
+    Each name is sketched as a MinHash of its character shingles and
+    indexed with MinHash LSH. Same grouping as match_similar_difflib, but
+    each name is only scored against the names the index returns for it,
+    so the work grows roughly linearly with the number of names. Scores
+    use the fastest available scorer (rapidfuzz, python-Levenshtein or
+    difflib).
+    
+    Args:
+        bases: Normalized base names to compare
+        similarity_threshold: Threshold for considering names similar (0.0-1.0)
+        
+    Returns:
+        Groups of two or more indices into bases, each in ascending order
+    """
+    if Indel is not None:
+        score = Indel.normalized_similarity
+    elif Levenshtein is not None:
+        score = Levenshtein.ratio
+    else:
+        score = lambda base1, base2: difflib.SequenceMatcher(None, base1, base2).ratio()
+    
+    shingles = [[base[i:i + SHINGLE_SIZE].encode('utf-8', 'surrogatepass') for i in range(max(1, len(base) - SHINGLE_SIZE + 1))]
+                for base in bases]
+    minhashes = MinHash.bulk(shingles, num_perm=MINHASH_PERMUTATIONS)
+    # The Jaccard similarity of two names' shingle sets drops off much
+    # faster than their edit similarity, so the index uses a lower bar and
+    # the exact score decides
+    lsh = MinHashLSH(threshold=similarity_threshold / 2, num_perm=MINHASH_PERMUTATIONS)
+    with lsh.insertion_session() as session:
+        for i, minhash in enumerate(minhashes):
+            session.insert(i, minhash)
+    
+    lengths = [len(base) for base in bases]
+    assigned = bytearray(len(bases))
+    groups = []
+    
+    for i, base1 in enumerate(bases):
+        if assigned[i]:
+            continue
+        
+        current_group = [i]
+        for j in sorted(lsh.query(minhashes[i])):
+            if (j > i and not assigned[j]
+                    and lengths_can_match(lengths[i], lengths[j], similarity_threshold)
+                    and score(base1, bases[j]) >= similarity_threshold):
+                current_group.append(j)
+                assigned[j] = 1
+        
+        if len(current_group) > 1:
+            assigned[i] = 1
+            groups.append(current_group)
+    
+    return groups
+
+def find_similar_files(file_names: List[str], similarity_threshold: float = 0.7,
+                       base_names: Dict[str, str] = None) -> Dict[str, List[str]]:
     """
     Find groups of similar files based on filename similarity.
     
     Args:
         file_names: List of filenames to compare
         similarity_threshold: Threshold for considering files similar (0.0-1.0)
+        base_names: Normalized base name of each file, as returned by
+            get_file_base_name; computed here if not given
         
     Returns:
         Dictionary mapping group identifiers to lists of similar filenames
     """
     # Extract base names for better comparison
-    base_names = {file: get_file_base_name(file) for file in file_names}
+    if base_names is None:
+        base_names = {file: get_file_base_name(file) for file in file_names}
     
     # Group by similar base names
     similarity_groups = defaultdict(list)
@@ -73,7 +415,8 @@ def find_similar_files(file_names: List[str], similarity_threshold: float = 0.7)
     
     # First pass - exact matches after normalization
     name_groups = defaultdict(list)
-    for file, base in base_names.items():
+    for file in file_names:
+        base = base_names[file]
         if base:  # Skip empty base names
             name_groups[base].append(file)
     
@@ -86,169 +429,223 @@ def find_similar_files(file_names: List[str], similarity_threshold: float = 0.7)
     
     # Second pass - sequence matching for remaining files
     remaining = [f for f in file_names if f not in processed]
+    bases = [base_names[f] for f in remaining]
     
-    for i, file1 in enumerate(remaining):
-        # Skip if this file is already in a group
-        if file1 in processed:
-            continue
-            
-        current_group = [file1]
-        base1 = base_names[file1]
-        
-        for file2 in remaining[i+1:]:
-            if file2 in processed:
-                continue
-                
-            base2 = base_names[file2]
-            
-            # Skip comparison if base names are too different in length
-            if abs(len(base1) - len(base2)) > min(len(base1), len(base2)):
-                continue
-                
-            similarity = difflib.SequenceMatcher(None, base1, base2).ratio()
-            
-            if similarity >= similarity_threshold:
-                current_group.append(file2)
-                processed.add(file2)
-        
-        if len(current_group) > 1:
-            group_key = min(current_group)
-            similarity_groups[group_key] = current_group
-            processed.add(file1)
+    if MinHashLSH is not None and len(bases) >= LSH_MIN_FILES:
+        index_groups = match_similar_lsh(bases, similarity_threshold)
+    elif process is not None:
+        index_groups = match_similar_rapidfuzz(bases, similarity_threshold)
+    elif Levenshtein is not None:
+        index_groups = match_similar_levenshtein(bases, similarity_threshold)
+    else:
+        index_groups = match_similar_difflib(bases, similarity_threshold)
+    
+    for indices in index_groups:
+        current_group = [remaining[i] for i in indices]
+        group_key = min(current_group)
+        similarity_groups[group_key] = current_group
     
     return similarity_groups
 
-def extract_common_patterns(file_names: List[str], min_length: int = 3) -> List[Tuple[str, float]]:
+@lru_cache(maxsize=8)
+def get_pattern_regexes(min_length: int) -> Tuple[re.Pattern, re.Pattern]:
+    """Compile the word and sequence regexes for a minimum pattern length."""
+    word_re = re.compile(r'\b\w{%d,}\b' % min_length)
+    sequence_re = re.compile(r'([a-z0-9]{%d,}(?:[_\-\s]+[a-z0-9]+){1,3})' % min_length)
+    return word_re, sequence_re
+
+def extract_common_patterns(file_names: List[str], min_length: int = 3,
+                            stems: Dict[str, str] = None, limit: int = None) -> List[Tuple[str, float]]:
     """
     Extract common patterns from file names with relevance scoring.
     
     Args:
         file_names: List of file names to analyze
         min_length: Minimum length of patterns to consider
+        stems: Each file name without its extension; computed here if not given
+        limit: If given, only return this many of the most relevant patterns
         
     Returns:
         List of (pattern, relevance_score) tuples sorted by relevance
     """
-    # Extract words and phrases from filenames
-    patterns = defaultdict(int)
-    
-    for name in file_names:
-        base_name = os.path.splitext(name)[0].lower()
-        
-        # Extract words
-        words = re.findall(r'\b\w{%d,}\b' % min_length, base_name)
-        for word in words:
-            patterns[word] += 1
-        
-        # Extract phrases (consecutive words)
-        phrases = re.findall(r'\b(\w+\s+\w+(?:\s+\w+){0,3})\b', base_name)
-        for phrase in phrases:
-            if len(phrase) >= min_length:
-                patterns[phrase] += 1
-                
-        # Extract sequential patterns (with connecting chars)
-        sequences = re.findall(r'([a-z0-9]{%d,}(?:[_\-\s]+[a-z0-9]+){1,3})' % min_length, base_name)
-        for seq in sequences:
-            patterns[seq] += 1
-    
-    # Calculate relevance scores
-    relevance_scores = []
-    for pattern, count in patterns.items():
-        if count >= 2 and len(pattern) >= min_length:
-            # Score based on pattern length, frequency, and specificity
-            specificity = len(pattern) / 20  # Normalize length
-            frequency = min(count / len(file_names), 0.5)  # Cap at 0.5 to prevent domination
-            score = specificity * frequency * count
-            relevance_scores.append((pattern, score))
-    
-    # Sort by relevance score (higher is better)
-    relevance_scores.sort(key=lambda x: x[1], reverse=True)
+    # Extract words and phrases from filenames. All the names are searched
+    # as one string so each regex runs once instead of once per file. They
+    # are joined with NUL, which can't appear in a file name and is neither
+    # a word nor a whitespace character, so no match can span two names.
+    word_re, sequence_re = get_pattern_regexes(min_length)
+    if stems is None:
+        stems = {name: os.path.splitext(name)[0] for name in file_names}
+    corpus = '\0'.join(stems[name].lower() for name in file_names)
+    
+    # Extract words
+    words = word_re.findall(corpus)
+    
+    # Extract phrases (consecutive words)
+    phrases = (phrase for phrase in PHRASE_RE.findall(corpus)
+               if len(phrase) >= min_length)
+    
+    # Extract sequential patterns (with connecting chars)
+    sequences = sequence_re.findall(corpus)
+    
+    # Count everything in one pass through Counter's C counting loop
+    patterns = Counter(chain(words, phrases, sequences))
+    
+    # Calculate relevance scores. Score based on pattern length (normalized
+    # by 20), frequency (capped at 0.5 to prevent domination) and count.
+    # Most patterns occur once, so drop those before doing any arithmetic.
+    total_files = len(file_names)
+    relevance_scores = [
+        (pattern, len(pattern) / 20 * (0.5 if 2 * count >= total_files else count / total_files) * count)
+        for pattern, count in patterns.items()
+        if count >= 2 and len(pattern) >= min_length
+    ]
+    
+    # Sort by relevance score (higher is better). Only the top few are
+    # usually wanted, which a heap finds without sorting every pattern;
+    # nlargest keeps ties in the same order as the full sort.
+    if limit is not None:
+        return heapq.nlargest(limit, relevance_scores, key=itemgetter(1))
+    relevance_scores.sort(key=itemgetter(1), reverse=True)
     return relevance_scores
 
-def get_unique_filename(destination_path: str) -> str:
+def hash_file(file_path: str, limit: int = None) -> bytes:
     """
-    Generate a unique filename if a duplicate exists.
+    Hash a file's content with BLAKE2b.
     
     Args:
-        destination_path: The target file path
+        file_path: Path of the file to hash
+        limit: If set, only hash the first `limit` bytes
         
     Returns:
-        A unique file path that doesn't exist yet
+        The binary digest
     """
-    if not os.path.exists(destination_path):
-        return destination_path
-        
-    directory, filename = os.path.split(destination_path)
-    name, extension = os.path.splitext(filename)
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        if limit is not None:
+            digest.update(f.read(limit))
+        else:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+    return digest.digest()
+
+def find_duplicate_files(folder_path: str, file_sizes: Dict[str, int]) -> List[List[str]]:
+    """
+    Find files with byte-identical content.
     
-    counter = 1
-    while True:
-        new_filename = f"{name} ({counter}){extension}"
-        new_path = os.path.join(directory, new_filename)
-        if not os.path.exists(new_path):
-            return new_path
-        counter += 1
+    Files are bucketed by size, then by a hash of their first few KB, and
+    only files that still collide are hashed in full, so most files are
+    never read completely. Empty files are ignored: they are all trivially
+    identical and aren't worth setting aside.
+    
+    Args:
+        folder_path: Path to the folder containing the files
+        file_sizes: Size in bytes of each file to check, keyed by name
         
+    Returns:
+        List of duplicate sets, each holding two or more file names
+    """
+    by_size = defaultdict(list)
+    for name, size in file_sizes.items():
+        if size > 0:
+            by_size[size].append(name)
+    
+    def split_by_hash(names: List[str], limit: int = None) -> List[List[str]]:
+        buckets = defaultdict(list)
+        for name in names:
+            try:
+                buckets[hash_file(os.path.join(folder_path, name), limit)].append(name)
+            except OSError:
+                # Unreadable files can't be confirmed as duplicates
+                continue
+        return [bucket for bucket in buckets.values() if len(bucket) > 1]
+    
+    duplicate_sets = []
+    for size, names in by_size.items():
+        if len(names) < 2:
+            continue
         
-def process_file(file_info: tuple, folder_path: str, dry_run: bool) -> tuple:
+        for candidates in split_by_hash(names, DUPLICATE_PREFIX_SIZE):
+            if size <= DUPLICATE_PREFIX_SIZE:
+                # The prefix hash already covered the whole file
+                duplicate_sets.append(candidates)
+            else:
+                duplicate_sets.extend(split_by_hash(candidates))
+    
+    return duplicate_sets
+
+def process_file(file_name: str, group_folder_name: str, folder_path: str, dry_run: bool,
+                 name_cache: DirNameCache) -> tuple:
     """Process a single file for grouping."""
-    file_name, group_folder_name = file_info
     source_path = os.path.join(folder_path, file_name)
     
     if not group_folder_name:
         group_folder_name = "Miscellaneous"
     
-    group_folder = os.path.join(folder_path, group_folder_name)
-    dest_path = os.path.join(group_folder, file_name)
-    
     # Handle duplicate file names
-    if os.path.exists(dest_path) and source_path != dest_path:
-        dest_path = get_unique_filename(dest_path)
+    dest_path = name_cache.reserve(file_name)
     
     if not dry_run and source_path != dest_path:
         try:
-            # Create directory with a try-except to handle race condition
-            try:
-                os.makedirs(group_folder, exist_ok=True)
-            except FileExistsError:
-                # This is fine, the directory already exists
-                pass
-                
-            shutil.move(source_path, dest_path)
+            # Group folders are all created up front by the caller, so
+            # there's no per-file makedirs here. move_file renames without
+            # replacing anything that appeared since the folder was listed,
+            # and only falls back to shutil.move across file systems.
+            move_file(source_path, dest_path, name_cache)
             return (file_name, group_folder_name, True)
         except (OSError, shutil.Error) as e:
             return (file_name, group_folder_name, f"Error: {str(e)}")
     
     return (file_name, group_folder_name, "Skipped (dry run)" if dry_run else "No action needed")
 
-def create_group_name_from_files(files: List[str]) -> str:
-    """Generate a descriptive group name from a list of files."""
+def process_batch(batch: range, file_names: List[str], group_ids: array, group_names: List[str],
+                  folder_path: str, dry_run: bool, name_caches: List[DirNameCache]) -> List[tuple]:
+    """
+    Process a batch of files for grouping on a single worker.
+    
+    Args:
+        batch: Range of indices into file_names/group_ids to process
+        file_names: Names of all files being organized
+        group_ids: Index into group_names for each file in file_names
+        group_names: Target folder names
+        folder_path: Path to the folder being organized
+        dry_run: If True, only report what would be done
+        name_caches: Name cache for each folder in group_names
+        
+    Returns:
+        A (file_name, group_name, status) tuple per processed file
+    """
+    results = []
+    for index in batch:
+        group_id = group_ids[index]
+        results.append(process_file(file_names[index], group_names[group_id], folder_path,
+                                    dry_run, name_caches[group_id]))
+    return results
+
+def create_group_name_from_files(files: List[str], stems: Dict[str, str] = None) -> str:
+    """Generate a descriptive group name from a list of files (and optionally their stems)."""
     if not files:
         return "Miscellaneous"
+    
+    if stems is None:
+        stems = {file: os.path.splitext(file)[0] for file in files}
         
-    # Extract common words/patterns
-    common_parts = []
+    # Extract and count common words
+    word_counts = Counter()
     for file in files:
-        base_name = os.path.splitext(file)[0]
-        # Remove numbers and special chars
-        cleaned = re.sub(r'[\d_\-\s()]+', ' ', base_name)
-        parts = cleaned.split()
-        common_parts.extend(parts)
-    
-    # Count occurrences
-    word_counts = defaultdict(int)
-    for word in common_parts:
-        if len(word) >= 3:
-            word_counts[word.lower()] += 1
+        base_name = stems[file]
+        # Remove numbers and special chars. ASCII names only need a
+        # character map; others may contain non-ASCII digits.
+        if base_name.isascii():
+            cleaned = base_name.translate(GROUP_NAME_STRIP_TABLE)
+        else:
+            cleaned = GROUP_NAME_STRIP_RE.sub(' ', base_name)
+        word_counts.update(word.lower() for word in cleaned.split() if len(word) >= 3)
     
     if not word_counts:
-        return os.path.splitext(min(files))[0][:30]
+        return stems[min(files)][:30]
     
-    # Get most common words
-    common_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)
-    
-    # Use top words for the group name (limit to 3)
-    name_parts = [word.title() for word, _ in common_words[:3]]
+    # Use the most common words for the group name (limit to 3)
+    name_parts = [word.title() for word, _ in word_counts.most_common(3)]
     group_name = "_".join(name_parts)
     
     return group_name[:50]  # Limit length
@@ -261,7 +658,10 @@ def group_files_by_similarity(
     min_files_per_group: int = 2,
     dry_run: bool = False,
     verbose: bool = False,
-    output_callback=None
+    output_callback=None,
+    detect_duplicates: bool = True,
+    threads: int = DEFAULT_IO_THREADS,
+    progress_callback=None
 ):
     """
     Organize files into folders based on filename similarities.
@@ -275,6 +675,11 @@ def group_files_by_similarity(
         dry_run: If True, only show what would be done without making changes
         verbose: Whether to print detailed logging information
         output_callback: Function to call with output strings for GUI display
+        detect_duplicates: If True, move extra copies of identical files into
+            a 'Duplicates' folder instead of grouping them by name
+        threads: Number of worker threads used to move files
+        progress_callback: Function to call with (processed, total) file counts
+            while files are moved, instead of printing progress lines
     """
     # Custom print function to redirect output to GUI
     def print_output(text):
@@ -285,15 +690,35 @@ def group_files_by_similarity(
     
     setup_logging(verbose)
     
-    if not os.path.exists(folder_path):
+    # Get all file names in the folder (excluding subfolders).
+    # DirEntry.is_file() reuses the type returned by the directory listing,
+    # so this avoids a stat call per entry. Sizes for duplicate detection
+    # come from the same entries (free on Windows, one stat elsewhere).
+    # A missing folder is reported from scandir itself rather than with a
+    # separate existence check up front.
+    file_names = []
+    file_sizes = {}
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                file_names.append(entry.name)
+                if detect_duplicates:
+                    try:
+                        file_sizes[entry.name] = entry.stat().st_size
+                    except OSError:
+                        pass
+    except FileNotFoundError:
         error_msg = f"Error: Folder '{folder_path}' does not exist!"
         print_output(error_msg)
         logging.error(error_msg)
         return
-    
-    # Get all file names in the folder (excluding subfolders)
-    file_names = [f for f in os.listdir(folder_path) 
-                 if os.path.isfile(os.path.join(folder_path, f))]
+    except NotADirectoryError:
+        error_msg = f"Error: '{folder_path}' is not a folder!"
+        print_output(error_msg)
+        logging.error(error_msg)
+        return
     
     if not file_names:
         warning_msg = f"No files found in '{folder_path}'"
@@ -304,36 +729,69 @@ def group_files_by_similarity(
     print_output(f"Found {len(file_names)} files to organize")
     logging.info(f"Found {len(file_names)} files to organize")
     
+    # Set aside exact duplicates before the similarity analysis, keeping the
+    # shortest name of each set in the normal grouping
+    duplicate_files = []
+    if detect_duplicates:
+        print_output("Checking for duplicate files...")
+        logging.info("Checking for duplicate files...")
+        for duplicate_set in find_duplicate_files(folder_path, file_sizes):
+            duplicate_set.sort(key=lambda name: (len(name), name))
+            duplicate_files.extend(duplicate_set[1:])
+        
+        if duplicate_files:
+            duplicate_lookup = set(duplicate_files)
+            file_names = [f for f in file_names if f not in duplicate_lookup]
+    
     # Find similar files based on filename
     print_output("Finding similar files...")
     logging.info("Finding similar files...")
-    similarity_groups = find_similar_files(file_names, similarity_threshold)
+    # Split off every extension once; the helpers below all reuse the stems
+    stems = {file: os.path.splitext(file)[0] for file in file_names}
+    base_names = {file: normalize_stem(stem) for file, stem in stems.items()}
+    similarity_groups = find_similar_files(file_names, similarity_threshold, base_names)
     
     # Find common patterns for remaining files
-    processed_files = set()
-    for group_files in similarity_groups.values():
-        processed_files.update(group_files)
-    
+    processed_files = set(chain.from_iterable(similarity_groups.values()))
     remaining_files = [f for f in file_names if f not in processed_files]
     
     if remaining_files:
         print_output(f"Finding patterns in {len(remaining_files)} remaining files...")
         logging.info(f"Finding patterns in {len(remaining_files)} remaining files...")
-        patterns = extract_common_patterns(remaining_files, min_pattern_length)
+        patterns = extract_common_patterns(remaining_files, min_pattern_length, stems, limit=max_groups)
         
-        # Apply patterns to remaining files
-        pattern_groups = defaultdict(list)
-        remaining_processed = set()
+        # Apply patterns to remaining files: each file goes to the most
+        # relevant pattern it contains. Lowercase every name once and stop
+        # at the first match instead of rescanning all files per pattern.
+        top_patterns = [pattern for pattern, _ in patterns]
+        pattern_members = [[] for _ in top_patterns]
         
-        for pattern, _ in patterns[:max_groups]:
+        # Patterns are sorted by relevance, so each file goes to the
+        # earliest pattern found in its name
+        if ahocorasick is not None and top_patterns and all(top_patterns):
+            automaton = ahocorasick.Automaton()
+            for index, pattern in enumerate(top_patterns):
+                automaton.add_word(pattern, index)
+            automaton.make_automaton()
+            
             for file in remaining_files:
-                if file in remaining_processed:
-                    continue
-                if pattern in file.lower():
-                    sanitized_pattern = sanitize_folder_name(pattern)
-                    if sanitized_pattern:
-                        pattern_groups[sanitized_pattern].append(file)
-                        remaining_processed.add(file)
+                index = min((index for _, index in automaton.iter(file.lower())), default=None)
+                if index is not None:
+                    pattern_members[index].append(file)
+        else:
+            for file in remaining_files:
+                lower_name = file.lower()
+                for index, pattern in enumerate(top_patterns):
+                    if pattern in lower_name:
+                        pattern_members[index].append(file)
+                        break
+        
+        pattern_groups = defaultdict(list)
+        for pattern, members in zip(top_patterns, pattern_members):
+            if members:
+                sanitized_pattern = sanitize_folder_name(pattern)
+                if sanitized_pattern:
+                    pattern_groups[sanitized_pattern].extend(members)
         
         # Keep only groups with enough files
         pattern_groups = {k: v for k, v in pattern_groups.items() 
@@ -345,57 +803,64 @@ def group_files_by_similarity(
                 similarity_groups[pattern] = files
     
     # Create better group names for groups based on representative files
+    # file_groups maps each file to its final group (None until placed), so
+    # whatever is left over can be read off directly for Miscellaneous
+    file_groups = dict.fromkeys(file_names)
     final_groups = {}
+    group_counters = Counter()
+    # Added after the named groups, so no other group may take these names
+    reserved_names = ("Miscellaneous", "Duplicates")
     for key, files in similarity_groups.items():
         if len(files) >= min_files_per_group:
             # Use the key as the folder name if it's a pattern, otherwise create name from files
-            if key in file_names:
+            if key in file_groups:
                 # This is a similarity-based group, create a descriptive name
-                group_name = sanitize_folder_name(create_group_name_from_files(files))
+                group_name = sanitize_folder_name(create_group_name_from_files(files, stems))
             else:
                 # This is a pattern-based group, use the sanitized pattern
                 group_name = sanitize_folder_name(key)
+            
+            # If we have a duplicate group name, add a number so the groups
+            # don't overwrite each other
+            base_group_name = group_name
+            while group_name in final_groups or group_name in reserved_names:
+                group_counters[base_group_name] += 1
+                group_name = f"{base_group_name} {group_counters[base_group_name] + 1}"
                 
             final_groups[group_name] = files
+            file_groups.update(dict.fromkeys(files, group_name))
     
     # Assign remaining files to Miscellaneous
-    all_grouped_files = set()
-    for files in final_groups.values():
-        all_grouped_files.update(files)
-    
-    misc_files = [f for f in file_names if f not in all_grouped_files]
+    misc_files = [f for f, group_name in file_groups.items() if group_name is None]
     if misc_files:
         final_groups["Miscellaneous"] = misc_files
-        
-    group_counters = defaultdict(int)
-    unique_groups = {}
     
-    # Display the grouping plan
-    print_output("\nProposed file grouping:")
-    for group_name, files in sorted(final_groups.items(), key=lambda x: len(x[1]), reverse=True):
-        print_output(f"\n{group_name} ({len(files)} files)")
-        print_output(f"  Example files: {', '.join(files[:3])}")
-        base_group_name = group_name
-        group_counters[base_group_name] += 1
-        
-        # If we have a duplicate group name, add a number
-        if group_counters[base_group_name] > 1:
-            group_name = f"{base_group_name} {group_counters[base_group_name]}"
-            
-        unique_groups[group_name] = files
+    if duplicate_files:
+        final_groups["Duplicates"] = duplicate_files
     
-    print_output("\nProposed file grouping:")
-    for group_name, files in sorted(unique_groups.items(), key=lambda x: len(x[1]), reverse=True):
-        print_output(f"\n{group_name} ({len(files)} files)")
-        print_output(f"  Example files: {', '.join(files[:3])}")
+    # Display the grouping plan, sent as one block so the GUI only has to
+    # insert and scroll once
+    plan_lines = ["\nProposed file grouping:"]
+    for group_name, files in sorted(final_groups.items(), key=lambda x: len(x[1]), reverse=True):
+        plan_lines.append(f"\n{group_name} ({len(files)} files)")
+        plan_lines.append(f"  Example files: {', '.join(files[:3])}")
+    print_output("\n".join(plan_lines))
     
-    # Create all group directories first to avoid race conditions
+    # Create all group directories first to avoid race conditions, noting
+    # which ones are new: those are known to be empty and needn't be listed
+    created_groups = set()
     if not dry_run:
         print_output("\nCreating group directories...")
-        for group_name in unique_groups.keys():
+        for group_name in final_groups.keys():
             group_folder = os.path.join(folder_path, group_name)
             try:
-                os.makedirs(group_folder, exist_ok=True)
+                os.mkdir(group_folder)
+                created_groups.add(group_name)
+            except FileExistsError:
+                if not os.path.isdir(group_folder):
+                    error_msg = f"Error creating directory '{group_name}': a file with that name already exists"
+                    print_output(error_msg)
+                    logging.error(error_msg)
             except Exception as e:
                 error_msg = f"Error creating directory '{group_name}': {str(e)}"
                 print_output(error_msg)
@@ -406,34 +871,68 @@ def group_files_by_similarity(
         print_output("\nOrganizing files...")
     
     # Custom tqdm-like progress tracking for GUI
-    total_files = len(file_names)
+    total_files = len(file_names) + len(duplicate_files)
     processed_count = 0
+    last_progress_time = time.monotonic()
     
-    # Process files
-    file_infos = []
-    for group_name, files in unique_groups.items():
-        for file in files:
-            file_infos.append((file, group_name))
+    # Process files. The plan is kept as parallel arrays (file names and
+    # compact group ids into group_names) rather than a tuple per file.
+    group_names = list(final_groups)
+    plan_names = []
+    plan_group_ids = array('i')
+    for group_id, files in enumerate(final_groups.values()):
+        plan_names.extend(files)
+        plan_group_ids.extend([group_id] * len(files))
     
-    for file_info in file_infos:
-        file_name, group_name = file_info
-        file_name, group, status = process_file(file_info, folder_path, dry_run)
-        
-        processed_count += 1
-        if verbose:
-            log_msg = f"Processed: {file_name} → {group}/ ({status})"
-            print_output(log_msg)
-            logging.info(log_msg)
+    # List each group folder once so duplicate names are resolved in memory
+    name_caches = [DirNameCache(os.path.join(folder_path, group_name),
+                                [] if group_name in created_groups else None)
+                   for group_name in group_names]
+    
+    # Submit files to the pool in batches: one future per file costs more
+    # in locking and bookkeeping than the moves save on large folders
+    batch_size = max(32, len(plan_names) // (threads * 4))
+    batches = [range(start, min(start + batch_size, len(plan_names)))
+               for start in range(0, len(plan_names), batch_size)]
+    
+    # Never start more threads than there are batches, and only one for a
+    # dry run, which doesn't wait on the disk
+    max_workers = 1 if dry_run else max(1, min(threads, len(batches)))
+    
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                               thread_name_prefix="organize") as executor:
+        futures = [executor.submit(process_batch, batch, plan_names, plan_group_ids, group_names,
+                                   folder_path, dry_run, name_caches)
+                   for batch in batches]
         
-        # Update progress every 10 files or at the end
-        if processed_count % 10 == 0 or processed_count == total_files:
-            print_output(f"Progress: {processed_count}/{total_files} files")
+        # Report batches as they finish so one slow move doesn't hold back
+        # progress for the batches behind it
+        for future in concurrent.futures.as_completed(futures):
+            for file_name, group, status in future.result():
+                processed_count += 1
+                if verbose:
+                    log_msg = f"Processed: {file_name} → {group}/ ({status})"
+                    print_output(log_msg)
+                    logging.info(log_msg)
+            
+            # Report progress at most every PROGRESS_INTERVAL seconds, and
+            # always at the end
+            now = time.monotonic()
+            if processed_count == total_files or now - last_progress_time >= PROGRESS_INTERVAL:
+                last_progress_time = now
+                if progress_callback:
+                    progress_callback(processed_count, total_files)
+                else:
+                    print_output(f"Progress: {processed_count}/{total_files} files")
     
     # Summary
     print_output("\n✅ Organization " + ("simulation" if dry_run else "process") + " complete!")
-    print_output(f"Created {len(final_groups) - (1 if 'Miscellaneous' in final_groups else 0)} groups")
+    special_groups = [name for name in ("Miscellaneous", "Duplicates") if name in final_groups]
+    print_output(f"Created {len(final_groups) - len(special_groups)} groups")
     if "Miscellaneous" in final_groups:
         print_output(f"{len(final_groups['Miscellaneous'])} files placed in 'Miscellaneous'")
+    if "Duplicates" in final_groups:
+        print_output(f"{len(final_groups['Duplicates'])} duplicate files placed in 'Duplicates'")
     
     if dry_run:
         print_output("\nThis was a dry run. No files were actually moved.")
@@ -441,22 +940,16 @@ def group_files_by_similarity(
 
 # Create a custom logger that redirects to our text widget
 class TextRedirector:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
-        self.buffer = ""
+    def __init__(self, output_queue):
+        self.output_queue = output_queue
 
     def write(self, string):
-        self.buffer += string
-        if '\n' in string:
-            self.text_widget.insert(tk.END, self.buffer)
-            self.text_widget.see(tk.END)
-            self.buffer = ""
+        # Writes come from worker threads, which must not touch Tk widgets.
+        # The GUI thread picks the text up in FileOrganizerApp.drain_output.
+        self.output_queue.put(string)
 
     def flush(self):
-        if self.buffer:
-            self.text_widget.insert(tk.END, self.buffer)
-            self.text_widget.see(tk.END)
-            self.buffer = ""
+        pass
             
 
 class FileOrganizerApp:
@@ -557,11 +1050,19 @@ class FileOrganizerApp:
         self.output_text = scrolledtext.ScrolledText(output_frame, wrap=tk.WORD, height=20)
         self.output_text.pack(fill=tk.BOTH, expand=True)
         
+        # Progress bar
+        self.progress_bar = ttk.Progressbar(main_frame, orient=tk.HORIZONTAL, mode="determinate")
+        self.progress_bar.pack(fill=tk.X, pady=5)
+        
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
         status_bar = ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         
+        # Output written from worker threads, inserted in batches
+        self.output_queue = queue.Queue()
+        self.root.after(OUTPUT_POLL_MS, self.drain_output)
+        
         # Set a default directory if available
         default_dir = os.path.expanduser("~/Downloads")
         if os.path.exists(default_dir):
@@ -575,22 +1076,38 @@ class FileOrganizerApp:
             self.dir_entry.insert(0, directory)
     
     def add_to_output(self, text):
-        """Add text to the output area."""
-        self.output_text.insert(tk.END, text)
-        self.output_text.see(tk.END)
-        self.output_text.update_idletasks()
+        """Add text to the output area; safe to call from worker threads."""
+        # Shares the queue with redirected stdout, so output stays in order
+        self.output_queue.put(text)
+    
+    def drain_output(self):
+        """Insert all queued output with a single insert and scroll."""
+        chunks = []
+        try:
+            while True:
+                chunks.append(self.output_queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        if chunks:
+            self.output_text.insert(tk.END, "".join(chunks))
+            self.output_text.see(tk.END)
+        self.root.after(OUTPUT_POLL_MS, self.drain_output)
     
     def clear_output(self):
         """Clear the output area."""
         self.output_text.delete(1.0, tk.END)
     
+    def update_progress(self, processed, total):
+        """Show file-move progress; safe to call from worker threads."""
+        self.root.after(0, lambda: self.progress_bar.configure(maximum=total, value=processed))
+    
     def update_status(self, message):
-        """Update the status bar message."""
-        self.status_var.set(message)
-        self.root.update_idletasks()
+        """Update the status bar message; safe to call from worker threads."""
+        self.root.after(0, self.status_var.set, message)
     
-    def run_task(self, task_func, is_dry_run):
-        """Run the file organization in a separate thread."""
+    def start_task(self, task_func, is_dry_run):
+        """Check the inputs on the GUI thread, then run the task in a separate thread."""
         directory = self.dir_entry.get()
         if not directory or not os.path.isdir(directory):
             messagebox.showerror("Error", "Please select a valid directory.")
@@ -605,20 +1122,31 @@ class FileOrganizerApp:
         # Clear output
         self.clear_output()
         
+        threading.Thread(target=self.run_task, args=(task_func, directory, is_dry_run, self.verbose_var.get()),
+                         daemon=True).start()
+    
+    def run_task(self, task_func, directory, is_dry_run, verbose):
+        """
+        Run the file organization. Called on a worker thread, so it only
+        reaches the widgets through add_to_output, update_status and
+        update_progress.
+        """
         # Redirect stdout to our output widget
         original_stdout = sys.stdout
-        sys.stdout = TextRedirector(self.output_text)
+        sys.stdout = TextRedirector(self.output_queue)
         
         # Update status
         self.update_status("Running..." + (" (Dry Run)" if is_dry_run else ""))
+        self.update_progress(0, 1)
         
         try:
             # Run the task function
             task_func(
                 directory,
                 dry_run=is_dry_run,
-                verbose=self.verbose_var.get(),
-                output_callback=self.add_to_output
+                verbose=verbose,
+                output_callback=self.add_to_output,
+                progress_callback=self.update_progress
             )
             self.update_status("Completed" + (" (Dry Run)" if is_dry_run else ""))
         except Exception as e:
@@ -632,15 +1160,15 @@ class FileOrganizerApp:
     
     def run_analysis(self):
         """Run a dry-run analysis."""
-        threading.Thread(target=self.run_task, args=(group_files_by_similarity, True), daemon=True).start()
+        self.start_task(group_files_by_similarity, True)
     
     def run_organization(self):
         """Run the actual organization."""
-        threading.Thread(target=self.run_task, args=(group_files_by_similarity, False), daemon=True).start()
+        self.start_task(group_files_by_similarity, False)
     
     def run_flatten(self):
         """Run the flatten directory operation."""
-        threading.Thread(target=self.run_task, args=(flatten_directory, self.dry_run_var.get()), daemon=True).start()
+        self.start_task(flatten_directory, self.dry_run_var.get())
 
 # Run the application
 if __name__ == "__main__":